@@ -1,9 +1,158 @@
 import os
+import json
+import math
+import hashlib
 import logging
-import shutil
+import threading
+import zipfile
+from contextlib import contextmanager
+import multiprocessing as mp
+from functools import lru_cache, partial
+from urllib.parse import urlparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import numpy as np
 import geopandas as gpd
+import pyogrio
 import rasterio
-from rasterio.mask import mask
+import shapely
+from shapely.geometry import mapping
+from pyproj import CRS, Transformer
+from rasterio.features import geometry_mask
+from rasterio.enums import Resampling
+from rasterio.errors import WindowError
+from rasterio.io import MemoryFile
+from rasterio.vrt import WarpedVRT
+from rasterio.windows import Window, from_bounds
+
+from popclip import __version__
+from popclip.download import robust_download
+
+if int(shapely.__version__.split(".")[0]) < 2:
+    raise ImportError(f"popclip requires shapely>=2.0 for vectorized clipping, found {shapely.__version__}")
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_ARROW = True
+except Exception:  # missing, or built against another NumPy; pyogrio then reads and writes without Arrow
+    HAS_ARROW = False
+# gpd.read_file / GeoDataFrame.to_file arguments: pyogrio's batched OGR I/O, through Arrow when available.
+IO_OPTIONS = {"engine": "pyogrio", "use_arrow": HAS_ARROW}
+# pyogrio can only write through Arrow on GDAL 3.8 or newer.
+WRITE_OPTIONS = dict(IO_OPTIONS, use_arrow=HAS_ARROW and pyogrio.__gdal_version__ >= (3, 8, 0))
+
+# Lets GDAL range-read remote GeoTIFFs over /vsicurl/ without probing for sidecar files.
+GDAL_REMOTE_OPTIONS = {
+    "CPL_VSIL_CURL_ALLOWED_EXTENSIONS": ".tif,.tiff,.vrt",
+    "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+}
+
+# Written next to every output; an output is only reused when its sidecar matches the current run.
+SIDECAR_SUFFIX = ".popclip.json"
+
+# Tile edge, in pixels, of clipped GeoTIFF outputs.
+RASTER_BLOCK_SIZE = 512
+
+def is_remote(path):
+    """Returns True for http(s) URLs."""
+    return path.startswith(("http://", "https://"))
+
+def is_remote_raster(path):
+    """Returns True for http(s) URLs of GeoTIFFs, which GDAL can range-read over /vsicurl/."""
+    return is_remote(path) and urlparse(path).path.lower().endswith((".tif", ".tiff"))
+
+@lru_cache(maxsize=32)
+def get_transformer(src_wkt, dst_wkt):
+    """Returns a Transformer for the CRS pair, built once; construction costs far more than transforming."""
+    return Transformer.from_crs(src_wkt, dst_wkt, always_xy=True)
+
+@lru_cache(maxsize=8)
+def _read_boundary(path, mtime):
+    return gpd.read_file(path, **IO_OPTIONS)
+
+def read_boundary(path):
+    """Reads a boundary file, parsed once per path and modification time; returns a copy safe to modify."""
+    path = os.path.abspath(path)
+    return _read_boundary(path, os.path.getmtime(path)).copy()
+
+def reproject(geoms, src_crs, dst_crs):
+    """Reprojects a geometry or geometry array between CRS through the cached Transformer.
+
+    Geometries with Z coordinates are transformed in 3D and keep them, as with GeoSeries.to_crs.
+    """
+    transformer = get_transformer(CRS.from_user_input(src_crs).to_wkt(), CRS.from_user_input(dst_crs).to_wkt())
+
+    def transform_coords(coords):
+        return np.column_stack(transformer.transform(*coords.T))
+
+    has_z = shapely.has_z(geoms)
+    if np.ndim(has_z) == 0:
+        return shapely.transform(geoms, transform_coords, include_z=bool(has_z))
+    geoms = np.array(geoms, dtype=object)
+    geoms[~has_z] = shapely.transform(geoms[~has_z], transform_coords)
+    geoms[has_z] = shapely.transform(geoms[has_z], transform_coords, include_z=True)
+    return geoms
+
+def simplify_for_raster(geoms, res):
+    """Simplifies geometries to a quarter of the smallest pixel size in res, dropping vertices too close
+    together for rasterization to tell apart."""
+    return shapely.simplify(geoms, min(map(abs, res)) / 4, preserve_topology=True)
+
+def bounds_window(src, bounds):
+    """Returns the whole-pixel window of src covering bounds, clamped to the raster extent.
+
+    Raises rasterio's WindowError when bounds lie entirely outside the raster.
+    """
+    window = from_bounds(*bounds, transform=src.transform)
+    col_off, row_off = math.floor(window.col_off), math.floor(window.row_off)
+    width = math.ceil(window.col_off + window.width) - col_off
+    height = math.ceil(window.row_off + window.height) - row_off
+    return Window(col_off, row_off, width, height).intersection(Window(0, 0, src.width, src.height))
+
+def gtiff_profile(dtype, width, height):
+    """GeoTIFF creation options for clipped rasters: DEFLATE with a predictor matching dtype, tiled when large enough."""
+    profile = {
+        "driver": "GTiff",
+        "compress": "deflate",
+        "predictor": 2 if np.issubdtype(np.dtype(dtype), np.integer) else 3,
+        "BIGTIFF": "IF_SAFER",
+    }
+    if width >= RASTER_BLOCK_SIZE and height >= RASTER_BLOCK_SIZE:
+        profile.update({"tiled": True, "blockxsize": RASTER_BLOCK_SIZE, "blockysize": RASTER_BLOCK_SIZE})
+    return profile
+
+def repair_geometries(gdf):
+    """Runs make_valid on the invalid geometries only; returns the frame and how many were repaired."""
+    geoms = np.array(gdf.geometry.values)
+    invalid = ~shapely.is_valid(geoms) & ~shapely.is_missing(geoms)
+    repaired = int(invalid.sum())
+    if repaired:
+        geoms[invalid] = shapely.make_valid(geoms[invalid])
+        gdf = gdf.set_geometry(geoms, crs=gdf.crs)
+    return gdf, repaired
+
+# Multi-part constructor for the parts kept by keep_dimension, by dimension.
+MULTI_PART_TYPES = {0: shapely.multipoints, 1: shapely.multilinestrings, 2: shapely.multipolygons}
+
+def keep_dimension(geoms, dims):
+    """Drops the parts of each geometry whose dimension is not dims, e.g. the lines and points an
+    intersection leaves where a polygon only touches the mask; geometries with nothing left become empty."""
+    collections = shapely.get_type_id(geoms) == shapely.GeometryType.GEOMETRYCOLLECTION
+    mixed = (collections | (shapely.get_dimensions(geoms) != dims)) & np.isin(dims, list(MULTI_PART_TYPES))
+    mixed &= ~shapely.is_missing(geoms)
+    for i in np.flatnonzero(mixed):
+        parts = shapely.get_parts(shapely.get_parts(geoms[i]))
+        parts = parts[shapely.get_dimensions(parts) == dims[i]]
+        geoms[i] = parts[0] if len(parts) == 1 else MULTI_PART_TYPES[dims[i]](parts)
+    return geoms
+
+def mask_union(gdf):
+    """Returns the single geometry a boundary frame clips to: its only geometry, or the union of all."""
+    return gdf.geometry.iloc[0] if len(gdf) == 1 else gdf.unary_union
+
+def crs_identifier(crs):
+    """Returns a stable name for crs: its authority code when it has one, since WKT varies by round trip."""
+    authority = crs.to_authority()
+    return ":".join(authority) if authority else crs.to_wkt()
 
 def get_logger():
     """Singleton logger setup to prevent duplicate log handlers."""
@@ -17,106 +166,453 @@ def get_logger():
     return logger
 
 class DataClipper:
-    def __init__(self, input_path, geojson_clip_path, output_folder):
+    # Candidate count above which clip_to_mask switches to per-tile intersection.
+    VECTOR_TILE_SIZE = 100_000
+    # ZIP members worth extracting: rasters and the shapefile parts OGR needs to open them.
+    ZIP_MEMBER_EXTENSIONS = (".tif", ".tiff", ".shp", ".shx", ".dbf", ".prj", ".cpg")
+    # Vector output format -> (file extension, OGR driver, layer creation options); GeoParquet is
+    # written with to_parquet.
+    VECTOR_FORMATS = {
+        "flatgeobuf": (".fgb", "FlatGeobuf", {"SPATIAL_INDEX": "YES"}),
+        "gpkg": (".gpkg", "GPKG", {"SPATIAL_INDEX": "YES"}),
+        "parquet": (".parquet", None, {}),
+        "geojson": (".geojson", "GeoJSON", {}),
+    }
+
+    def __init__(self, input_path, geojson_clip_path, output_folder, clip_to_bbox=False, output_format="flatgeobuf",
+                 geojson=None, max_workers=None, warp_to_mask_crs=False, simplify_mask=True, use_dask=False):
         self.logger = get_logger()
         self.logger.info("Initializing DataClipper.")
 
-        self.input_path = os.path.abspath(input_path)
+        self.input_path = input_path if is_remote(input_path) else os.path.abspath(input_path)
         self.geojson_clip_path = os.path.abspath(geojson_clip_path)
         self.output_folder = os.path.abspath(output_folder)
+        self.clip_to_bbox = clip_to_bbox
+        if output_format not in self.VECTOR_FORMATS:
+            raise ValueError(f"Unsupported vector output format: {output_format}")
+        self.output_format = output_format
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Warp rasters into the boundary CRS on read instead of keeping their own CRS in the output.
+        self.warp_to_mask_crs = warp_to_mask_crs
+        # Simplify the boundary to a quarter pixel before rasterizing it; vector clips always use it as is.
+        self.simplify_mask = simplify_mask
+        # Clip local rasters through rioxarray's lazy, Dask-chunked reads instead of the window thread pool.
+        self.use_dask = use_dask
+        self.lock = threading.Lock()
         os.makedirs(self.output_folder, exist_ok=True)
 
-        self.geojson = self.load_geojson(self.geojson_clip_path)
+        # A preloaded boundary (e.g. shared with batch workers) skips re-reading geojson_clip_path.
+        self.geojson = geojson if geojson is not None else self.load_geojson(self.geojson_clip_path)
+        self._mask_union = mask_union(self.geojson)
+        self._mask_bounds = self._mask_union.bounds
+        self._mask_parts = shapely.get_parts(self._mask_union)
+        shapely.prepare(self._mask_union)
+        self._mask_by_crs = {}
+        self._clip_geom_by_crs = {}
+        self._clip_shapes_by_crs = {}
+        self._geojson_hash = hashlib.blake2b(
+            shapely.to_wkb(self._mask_union) + crs_identifier(self.geojson.crs).encode()
+        ).hexdigest()[:16]
         self.logger.info("Initialization complete.")
 
-    def load_geojson(self, geojson_path):
+    @staticmethod
+    def load_geojson(geojson_path):
         """Loads the GeoJSON clipping file."""
+        logger = get_logger()
         if not os.path.exists(geojson_path):
-            self.logger.error("GeoJSON file not found: %s", geojson_path)
+            logger.error("GeoJSON file not found: %s", geojson_path)
             raise FileNotFoundError(f"GeoJSON file not found: {geojson_path}")
         try:
-            gdf = gpd.read_file(geojson_path)
+            gdf = read_boundary(geojson_path)
             if gdf.empty:
                 raise ValueError("GeoJSON file is empty.")
             if gdf.crs is None:
-                self.logger.warning("GeoJSON has no CRS, assuming EPSG:4326")
+                logger.warning("GeoJSON has no CRS, assuming EPSG:4326")
                 gdf.set_crs("EPSG:4326", inplace=True)
-            self.logger.info("GeoJSON successfully loaded.")
+            gdf, repaired = repair_geometries(gdf)
+            if repaired:
+                logger.warning("Repaired %d invalid geometries in GeoJSON", repaired)
+            logger.info("GeoJSON successfully loaded.")
             return gdf
         except Exception as e:
-            self.logger.error("Error loading GeoJSON: %s", e)
+            logger.error("Error loading GeoJSON: %s", e)
             raise
 
     def extract_zip(self, zip_path):
-        """Extracts ZIP file if necessary and returns the first valid vector or raster file inside."""
-        import zipfile
+        """Extracts the raster and shapefile members of a ZIP if necessary.
+
+        Returns the extraction directory and the dataset to clip inside it (None if there is none).
+        """
         extract_dir = os.path.splitext(zip_path)[0]
         if os.path.exists(extract_dir) and os.listdir(extract_dir):
             self.logger.info("ZIP already extracted, skipping: %s", extract_dir)
-            return extract_dir
+            return extract_dir, self.find_dataset(extract_dir)
         with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
-        self.logger.info("Extracted ZIP file to: %s", extract_dir)
-        return extract_dir
-
-    def clip_vector(self, input_path, output_path):
-        """Clips vector data using the GeoJSON and saves the result."""
-        if not output_path.endswith(".geojson"):
-            output_path += ".geojson"
-        if os.path.exists(output_path):
+            members = [name for name in zip_ref.namelist() if name.lower().endswith(self.ZIP_MEMBER_EXTENSIONS)]
+            zip_ref.extractall(extract_dir, members=members)
+        self.logger.info("Extracted %d dataset files from ZIP to: %s", len(members), extract_dir)
+        dataset = self.pick_dataset(members)
+        return extract_dir, os.path.join(extract_dir, dataset) if dataset else None
+
+    def pick_dataset(self, paths):
+        """Returns the first GeoTIFF among paths, else the first shapefile, in a single pass."""
+        shapefile = None
+        for path in paths:
+            name = path.lower()
+            if name.endswith((".tif", ".tiff")):
+                return path
+            if name.endswith(".shp") and shapefile is None:
+                shapefile = path
+        return shapefile
+
+    def output_state(self, input_path):
+        """Describes what an output is built from: the input file, the boundary, the options that change
+        the result and the popclip version."""
+        state = {
+            "geojson_hash": self._geojson_hash,
+            "clipper_version": __version__,
+            "options": {
+                "clip_to_bbox": self.clip_to_bbox,
+                "warp_to_mask_crs": self.warp_to_mask_crs,
+                "simplify_mask": self.simplify_mask,
+                "use_dask": self.use_dask,
+            },
+        }
+        if os.path.exists(input_path):
+            stat = os.stat(input_path)
+            state.update({"input_mtime": stat.st_mtime, "input_size": stat.st_size})
+        else:
+            state["input_path"] = input_path
+        return state
+
+    def is_up_to_date(self, input_path, output_path):
+        """Returns True if output_path exists and its sidecar matches the current input and boundary."""
+        sidecar_path = output_path + SIDECAR_SUFFIX
+        if not os.path.exists(output_path) or not os.path.exists(sidecar_path):
+            return False
+        try:
+            with open(sidecar_path) as f:
+                return json.load(f) == self.output_state(input_path)
+        except ValueError:
+            return False
+
+    def write_sidecar(self, input_path, output_path):
+        """Records what output_path was built from, for is_up_to_date on later runs."""
+        with open(output_path + SIDECAR_SUFFIX, "w") as f:
+            json.dump(self.output_state(input_path), f)
+
+    def find_dataset(self, directory):
+        """Returns the dataset to clip anywhere under directory, as ZIP members may sit in subfolders."""
+        return self.pick_dataset(
+            os.path.join(root, name) for root, _, names in os.walk(directory) for name in sorted(names)
+        )
+
+    def clip_by_rect(self, gdf, bounds):
+        """Clips geometries to an axis-aligned (xmin, ymin, xmax, ymax) box.
+
+        Envelopes are compared first, so only features straddling the box edge reach GEOS.
+        """
+        xmin, ymin, xmax, ymax = bounds
+        geoms = np.array(gdf.geometry.values)
+        envelopes = shapely.bounds(geoms)
+        overlaps = (
+            (envelopes[:, 0] <= xmax) & (envelopes[:, 2] >= xmin)
+            & (envelopes[:, 1] <= ymax) & (envelopes[:, 3] >= ymin)
+        )
+        inside = (
+            (envelopes[:, 0] >= xmin) & (envelopes[:, 2] <= xmax)
+            & (envelopes[:, 1] >= ymin) & (envelopes[:, 3] <= ymax)
+        )
+        crossing = overlaps & ~inside
+        geoms[crossing] = shapely.clip_by_rect(geoms[crossing], xmin, ymin, xmax, ymax)
+        clipped = gdf.set_geometry(geoms, crs=gdf.crs)
+        return clipped[overlaps & ~shapely.is_empty(geoms)]
+
+    def intersect_geometries(self, geoms, mask_geom):
+        """Intersects a geometry array with mask_geom, leaving the geometries strictly inside it untouched.
+
+        Like gpd.overlay, each result keeps only the parts of its input's dimension, so a polygon that just
+        touches the mask boundary is dropped rather than clipped to a line or point.
+        """
+        crossing = ~shapely.contains_properly(mask_geom, geoms)
+        clipped = shapely.intersection(geoms[crossing], mask_geom)
+        # Input collections may mix dimensions on purpose and are left as intersected.
+        dims = np.where(
+            shapely.get_type_id(geoms[crossing]) == shapely.GeometryType.GEOMETRYCOLLECTION,
+            -1, shapely.get_dimensions(geoms[crossing])
+        )
+        geoms[crossing] = keep_dimension(clipped, dims)
+        return geoms
+
+    def intersect_tile(self, tile_geoms):
+        """Intersects one tile of geometries with the part of the mask covering the tile.
+
+        A tile whose geometries span no area (a lone point, or points on one line) uses the whole mask, as
+        cutting the mask to a degenerate box would leave nothing to intersect with.
+        """
+        xmin, ymin, xmax, ymax = shapely.total_bounds(tile_geoms)
+        if xmin < xmax and ymin < ymax:
+            tile_mask = self._mask_union.intersection(shapely.box(xmin, ymin, xmax, ymax))
+            shapely.prepare(tile_mask)
+        else:
+            tile_mask = self._mask_union
+        return self.intersect_geometries(tile_geoms, tile_mask)
+
+    def intersect_tiled(self, geoms):
+        """Splits a large geometry array into a grid of tiles over the mask and intersects the tiles in parallel."""
+        n = math.ceil(math.sqrt(len(geoms) / self.VECTOR_TILE_SIZE))
+        xmin, ymin, xmax, ymax = self._mask_bounds
+        corners = shapely.bounds(geoms)[:, :2]
+        cols = np.clip(((corners[:, 0] - xmin) / ((xmax - xmin) or 1) * n).astype(int), 0, n - 1)
+        rows = np.clip(((corners[:, 1] - ymin) / ((ymax - ymin) or 1) * n).astype(int), 0, n - 1)
+        tile_ids = rows * n + cols
+        tiles = [np.flatnonzero(tile_ids == tile_id) for tile_id in np.unique(tile_ids)]
+
+        with ThreadPoolExecutor() as executor:
+            clipped_tiles = executor.map(self.intersect_tile, [geoms[positions] for positions in tiles])
+            for positions, tile_geoms in zip(tiles, clipped_tiles):
+                geoms[positions] = tile_geoms
+        return geoms
+
+    def clip_to_mask(self, gdf):
+        """Clips geometries to the mask, intersecting only those that cross its boundary."""
+        _, idx = gdf.sindex.query(self._mask_parts, predicate="intersects")
+        idx = np.unique(idx)
+        clipped = gdf.iloc[idx]
+
+        geoms = np.array(clipped.geometry.values)
+        if len(geoms) > self.VECTOR_TILE_SIZE:
+            geoms = self.intersect_tiled(geoms)
+        else:
+            geoms = self.intersect_geometries(geoms, self._mask_union)
+        clipped = clipped.set_geometry(geoms, crs=gdf.crs)
+        return clipped[~shapely.is_empty(geoms)]
+
+    def read_vector(self, input_path, bounds=None):
+        """Reads a vector file, letting OGR skip features outside the mask (or bounds) before they reach Python.
+
+        Reads through pyogrio directly: geopandas only forwards ``mask`` to pyogrio from 1.0 on.
+        """
+        mask_geom = shapely.box(*bounds) if bounds is not None else self._mask_union
+        crs = pyogrio.read_info(input_path)["crs"] or "EPSG:4326"
+        if self.geojson.crs != crs:
+            # Densified, so the box also covers mask edges that bulge past their corners once reprojected.
+            transformer = get_transformer(self.geojson.crs.to_wkt(), CRS.from_user_input(crs).to_wkt())
+            mask_geom = shapely.box(*transformer.transform_bounds(*mask_geom.bounds, densify_pts=21))
+        return pyogrio.read_dataframe(input_path, mask=mask_geom, use_arrow=HAS_ARROW)
+
+    def clip_vector(self, input_path, output_path, mask=None):
+        """Clips vector data using the GeoJSON and saves the result.
+
+        A tuple ``mask`` of (xmin, ymin, xmax, ymax) in the GeoJSON CRS clips to that box directly.
+        """
+        extension, driver, layer_options = self.VECTOR_FORMATS[self.output_format]
+        if os.path.splitext(output_path)[1] != extension:
+            output_path += extension
+        if os.path.abspath(output_path) == os.path.abspath(input_path):
+            raise ValueError(f"Refusing to overwrite the input with its clipped output: {input_path}")
+        if self.is_up_to_date(input_path, output_path):
             self.logger.info("Vector file already clipped, skipping: %s", output_path)
             return
         
+        if mask is None and (self.clip_to_bbox or self._mask_union.equals(self._mask_union.envelope)):
+            mask = self._mask_bounds
+
         self.logger.info("Clipping vector data: %s", input_path)
         try:
-            gdf = gpd.read_file(input_path)
+            gdf = self.read_vector(input_path, bounds=mask)
             if gdf.crs is None:
                 self.logger.warning("Vector file has no CRS, assuming EPSG:4326")
                 gdf.set_crs("EPSG:4326", inplace=True)
             if gdf.crs != self.geojson.crs:
-                gdf = gdf.to_crs(self.geojson.crs)
+                gdf = gdf.set_geometry(reproject(gdf.geometry.values, gdf.crs, self.geojson.crs), crs=self.geojson.crs)
+            gdf, repaired = repair_geometries(gdf)
+            if repaired:
+                self.logger.warning("Repaired %d invalid geometries in %s", repaired, input_path)
 
-            clipped = gpd.overlay(gdf, self.geojson, how="intersection")
+            if mask is not None:
+                clipped = self.clip_by_rect(gdf, mask)
+            else:
+                clipped = self.clip_to_mask(gdf)
             if clipped.empty:
                 self.logger.warning("Clipped vector data is empty: %s", input_path)
             else:
-                clipped.to_file(output_path, driver="GeoJSON")
+                if driver is None:
+                    clipped.to_parquet(output_path)
+                else:
+                    clipped.to_file(output_path, driver=driver, **WRITE_OPTIONS, **layer_options)
+                self.write_sidecar(input_path, output_path)
                 self.logger.info("Vector data clipped and saved: %s", output_path)
         except Exception as e:
             self.logger.error("Error processing vector file %s: %s", input_path, e)
 
-    def clip_raster(self, input_path, output_path):
-        """Clips raster data using the GeoJSON and saves the result."""
-        if os.path.exists(output_path):
+    def mask_for_crs(self, crs):
+        """Returns the mask union in the given CRS, reprojecting it at most once per CRS."""
+        if self.geojson.crs == crs:
+            return self._mask_union
+        if crs not in self._mask_by_crs:
+            mask_union = reproject(self._mask_union, self.geojson.crs, crs)
+            shapely.prepare(mask_union)
+            self._mask_by_crs[crs] = mask_union
+        return self._mask_by_crs[crs]
+
+    def clip_geometry_for(self, crs, res):
+        """Returns the prepared mask rasters of the given CRS and pixel size are clipped to.
+
+        With simplify_mask the boundary is first passed through simplify_for_raster.
+        """
+        key = (crs, tuple(res))
+        if key not in self._clip_geom_by_crs:
+            clip_geom = self.mask_for_crs(crs)
+            if self.simplify_mask:
+                clip_geom = simplify_for_raster(clip_geom, res)
+                shapely.prepare(clip_geom)
+            self._clip_geom_by_crs[key] = clip_geom
+        return self._clip_geom_by_crs[key]
+
+    def clip_shapes_for(self, crs, res):
+        """Returns clip_geometry_for(crs, res) as GeoJSON-like mappings, converted once for rasterization."""
+        key = (crs, tuple(res))
+        if key not in self._clip_shapes_by_crs:
+            self._clip_shapes_by_crs[key] = [mapping(self.clip_geometry_for(crs, res))]
+        return self._clip_shapes_by_crs[key]
+
+    def aoi_windows(self, src, aoi):
+        """Splits the mask window along the source's block grid, so each read touches whole source blocks.
+
+        Striped or untiled sources, whose blocks span the full raster width, are split into chunks of
+        RASTER_BLOCK_SIZE columns by a whole number of strips instead.
+        """
+        block_height, block_width = src.block_shapes[0]
+        if block_width >= src.width:
+            block_width = RASTER_BLOCK_SIZE
+            block_height = max(block_height, RASTER_BLOCK_SIZE // block_height * block_height)
+        row_start = aoi.row_off // block_height * block_height
+        col_start = aoi.col_off // block_width * block_width
+        for row in range(row_start, aoi.row_off + aoi.height, block_height):
+            for col in range(col_start, aoi.col_off + aoi.width, block_width):
+                yield Window(col, row, block_width, block_height).intersection(aoi)
+
+    @contextmanager
+    def open_source(self, input_path):
+        """Opens a raster for reading, warped on the fly to the boundary CRS if warp_to_mask_crs is set."""
+        with rasterio.Env(**GDAL_REMOTE_OPTIONS), rasterio.open(input_path) as src:
+            if self.warp_to_mask_crs and src.crs != self.geojson.crs:
+                with WarpedVRT(src, crs=self.geojson.crs.to_wkt(), resampling=Resampling.bilinear) as vrt:
+                    yield vrt
+            else:
+                yield src
+
+    def clip_windows(self, input_path, dest, aoi, clip_geom, clip_shapes, nodata, windows):
+        """Reads, masks and writes a batch of windows through this thread's own handle on the source.
+
+        Windows wholly inside the mask are copied as read and windows wholly outside it are written as
+        nodata without being read; only those crossing the boundary are rasterized.
+        """
+        with self.open_source(input_path) as src:
+            for window in windows:
+                window_box = shapely.box(*src.window_bounds(window))
+                if not clip_geom.intersects(window_box):
+                    data = np.full((src.count, window.height, window.width), nodata, dtype=src.dtypes[0])
+                else:
+                    data = src.read(window=window)
+                    if not clip_geom.contains_properly(window_box):
+                        outside = geometry_mask(
+                            clip_shapes, out_shape=data.shape[1:], transform=src.window_transform(window)
+                        )
+                        data[:, outside] = nodata
+                dest_window = Window(
+                    window.col_off - aoi.col_off, window.row_off - aoi.row_off, window.width, window.height
+                )
+                with self.lock:
+                    dest.write(data, window=dest_window)
+
+    def clip_raster(self, input_path, output_path=None, to_memory=False):
+        """Clips raster data using the GeoJSON and saves the result.
+
+        With ``to_memory`` the clipped GeoTIFF is kept in an open rasterio MemoryFile which is
+        returned instead of being written to ``output_path``; the caller is responsible for closing it.
+        """
+        if output_path is None and not to_memory:
+            raise ValueError("clip_raster needs an output_path unless to_memory is set")
+        if not to_memory and self.is_up_to_date(input_path, output_path):
             self.logger.info("Raster file already clipped, skipping: %s", output_path)
             return
         
         self.logger.info("Clipping raster data: %s", input_path)
+        memfile = None
         try:
-            with rasterio.open(input_path) as src:
-                clip_geom = self.geojson.to_crs(src.crs) if self.geojson.crs != src.crs else self.geojson
-                out_image, out_transform = mask(src, clip_geom.geometry, crop=True, nodata=src.nodata)
-                if out_image.size == 0:
+            with self.open_source(input_path) as src:
+                clip_geom = self.clip_geometry_for(src.crs, src.res)
+                try:
+                    aoi = bounds_window(src, clip_geom.bounds)
+                except WindowError:  # the boundary misses the raster
+                    aoi = None
+                if aoi is None or aoi.width == 0 or aoi.height == 0:
                     self.logger.warning("Clipped raster data is empty: %s", input_path)
                     return
 
                 clipped_meta = src.meta.copy()
                 clipped_meta.update({
-                    "driver": "GTiff",
-                    "height": out_image.shape[1],
-                    "width": out_image.shape[2],
-                    "transform": out_transform,
+                    "height": aoi.height,
+                    "width": aoi.width,
+                    "transform": src.window_transform(aoi),
                     "nodata": src.nodata
                 })
+                clipped_meta.update(gtiff_profile(src.meta["dtype"], aoi.width, aoi.height))
+
+                memfile = MemoryFile() if to_memory else None
+                dest = memfile.open(**clipped_meta) if to_memory else rasterio.open(output_path, "w", **clipped_meta)
+                with dest:
+                    windows = list(self.aoi_windows(src, aoi))
+                    nodata = src.nodata if src.nodata is not None else 0
+                    workers = min(self.max_workers, len(windows))
+                    clip_shapes = self.clip_shapes_for(src.crs, src.res)
+                    clip_windows = partial(self.clip_windows, input_path, dest, aoi, clip_geom, clip_shapes, nodata)
+                    with ThreadPoolExecutor(max_workers=workers) as executor:
+                        list(executor.map(clip_windows, [windows[i::workers] for i in range(workers)]))
+
+            if to_memory:
+                self.logger.info("Raster clipped in memory: %s", input_path)
+                return memfile
+            self.write_sidecar(input_path, output_path)
+            self.logger.info("Raster clipped and saved at %s", output_path)
+        except Exception as e:
+            if memfile is not None:
+                memfile.close()
+            self.logger.error("Error clipping raster %s: %s", input_path, e)
+
+    def clip_raster_xarray(self, input_path, output_path):
+        """Clips a raster lazily with rioxarray, letting Dask schedule the chunked reads and writes.
+
+        Needs the optional rioxarray and dask packages (the ``dask`` extra).
+        """
+        if self.is_up_to_date(input_path, output_path):
+            self.logger.info("Raster file already clipped, skipping: %s", output_path)
+            return
+
+        self.logger.info("Clipping raster data with rioxarray: %s", input_path)
+        try:
+            import rioxarray
 
-            with rasterio.open(output_path, "w", **clipped_meta) as dest:
-                dest.write(out_image)
+            with rasterio.Env(**GDAL_REMOTE_OPTIONS), \
+                    rioxarray.open_rasterio(input_path, chunks=True, lock=False) as data:
+                clip_shapes = self.clip_shapes_for(data.rio.crs, data.rio.resolution())
+                clipped = data.rio.clip(clip_shapes, data.rio.crs, from_disk=True, all_touched=False, drop=True)
+                height, width = clipped.rio.height, clipped.rio.width
+                clipped.rio.to_raster(
+                    output_path, lock=threading.Lock(), windowed=True, **gtiff_profile(clipped.dtype, width, height)
+                )
+            self.write_sidecar(input_path, output_path)
             self.logger.info("Raster clipped and saved at %s", output_path)
         except Exception as e:
             self.logger.error("Error clipping raster %s: %s", input_path, e)
 
     def process(self):
         """Determines file type and processes accordingly."""
+        if is_remote(self.input_path):
+            self.process_remote()
+            return
         if not os.path.exists(self.input_path):
             self.logger.error("Input file not found: %s", self.input_path)
             return
@@ -125,11 +621,7 @@ class DataClipper:
         output_path = os.path.join(self.output_folder, file_name)
 
         if self.input_path.endswith(".zip"):
-            extracted_dir = self.extract_zip(self.input_path)
-            input_path = next(
-                (os.path.join(extracted_dir, f) for f in os.listdir(extracted_dir) if f.lower().endswith((".tif", ".shp"))), 
-                None
-            )
+            _, input_path = self.extract_zip(self.input_path)
             if not input_path:
                 self.logger.warning("No valid files found in extracted ZIP: %s", self.input_path)
                 return
@@ -138,8 +630,89 @@ class DataClipper:
 
         ext = os.path.splitext(input_path)[1].lower()
         if ext in [".tif", ".tiff"]:
-            self.clip_raster(input_path, f"{output_path}.tif")
+            # The rioxarray path reads the raster in its own CRS, so warping keeps the window pipeline.
+            if self.use_dask and not self.warp_to_mask_crs:
+                self.clip_raster_xarray(input_path, f"{output_path}.tif")
+            else:
+                self.clip_raster(input_path, f"{output_path}.tif")
         elif ext in [".shp", ".geojson"]:
-            self.clip_vector(input_path, f"{output_path}.geojson")
+            extension = self.VECTOR_FORMATS[self.output_format][0]
+            self.clip_vector(input_path, output_path + extension)
         else:
             self.logger.warning("Unsupported file format: %s", input_path)
+
+    def process_remote(self):
+        """Clips a remote GeoTIFF in place over /vsicurl/, fetching only the byte ranges it needs."""
+        if not is_remote_raster(self.input_path):
+            self.logger.warning("Only remote GeoTIFFs can be streamed, skipping: %s", self.input_path)
+            return
+        file_name = os.path.basename(urlparse(self.input_path).path)
+        output_path = os.path.join(self.output_folder, file_name)
+        self.clip_raster(f"/vsicurl/{self.input_path}", f"{output_path}.tif")
+
+
+# Clip boundary shared by every dataset a batch worker process handles; set by _init_worker.
+_MASK = None
+# Raster clipping threads per worker process, so processes x threads stays near the core count.
+_RASTER_WORKERS = None
+
+
+def _init_worker(mask_wkb, crs_wkt, raster_workers):
+    """Rebuilds the batch's clip boundary once per worker process."""
+    global _MASK, _RASTER_WORKERS
+    _MASK = gpd.GeoDataFrame(geometry=[shapely.from_wkb(mask_wkb)], crs=crs_wkt)
+    _RASTER_WORKERS = raster_workers
+
+
+def process_dataset(dataset):
+    """Clips one (input_path, geojson_clip_path, output_folder) dataset; picklable for worker processes."""
+    input_path, geojson_clip_path, output_folder = dataset
+    DataClipper(input_path, geojson_clip_path, output_folder, geojson=_MASK, max_workers=_RASTER_WORKERS).process()
+    return input_path
+
+
+def download_dataset(url, data_folder):
+    """Downloads a remote dataset into data_folder unless already there and returns the local path."""
+    local_path = os.path.join(data_folder, os.path.basename(urlparse(url).path))
+    if not os.path.exists(local_path):
+        robust_download(url, local_path)
+    return local_path
+
+
+def process_datasets(input_paths, geojson_clip_path, output_folder, max_workers=None, data_folder="data",
+                     download_workers=8):
+    """Clips several datasets in parallel, one worker process per CPU core.
+
+    Remote inputs that cannot be streamed over /vsicurl/ are first downloaded into data_folder on a
+    thread pool; each one is handed to the clipping processes as soon as it lands, so downloads overlap
+    with clipping. The boundary is loaded and unioned once here and handed to the workers as WKB.
+    Returns the local or streamed paths that were clipped.
+    """
+    logger = get_logger()
+    max_workers = max_workers or os.cpu_count() or 1
+    boundary = DataClipper.load_geojson(os.path.abspath(geojson_clip_path))
+    raster_workers = max(1, (os.cpu_count() or 1) // max_workers)
+    initargs = (shapely.to_wkb(mask_union(boundary)), boundary.crs.to_wkt(), raster_workers)
+    # Download threads are already running when clip workers start, and forking a threaded process
+    # can deadlock on locks held by those threads; spawned workers get the boundary via initargs anyway.
+    context = mp.get_context("spawn")
+    os.makedirs(data_folder, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=download_workers) as io_pool, ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=context, initializer=_init_worker, initargs=initargs
+    ) as cpu_pool:
+        clips, downloads = [], {}
+        for input_path in input_paths:
+            if is_remote(input_path) and not is_remote_raster(input_path):
+                downloads[io_pool.submit(download_dataset, input_path, data_folder)] = input_path
+            else:
+                clips.append(cpu_pool.submit(process_dataset, (input_path, geojson_clip_path, output_folder)))
+
+        for future in as_completed(downloads):
+            try:
+                local_path = future.result()
+            except Exception as e:
+                logger.error("Error downloading %s: %s", downloads[future], e)
+                continue
+            clips.append(cpu_pool.submit(process_dataset, (local_path, geojson_clip_path, output_folder)))
+        return [future.result() for future in clips]
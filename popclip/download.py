@@ -0,0 +1,140 @@
+import os
+import logging
+import shutil
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import urllib3
+from urllib3.connection import HTTPConnection
+from urllib3.util import Retry
+from tqdm import tqdm
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024
+# Parallel byte-range connections per download, and the size below which one stream is used instead.
+DOWNLOAD_CONNECTIONS = 8
+MIN_RANGED_DOWNLOAD_SIZE = 64 * 1024 * 1024
+# Ranged downloads preallocate the whole file, so they must never be taken for a resumable .part file.
+RANGED_TEMP_SUFFIX = ".ranged.part"
+# Kernel receive buffer requested per connection, so fast links are not throttled by TCP window size.
+SOCKET_RECEIVE_BUFFER = 4 * 1024 * 1024
+
+
+# Keep-alive connection pool shared by every download in the process, so repeated and parallel
+# requests to the same host reuse TCP connections and TLS sessions.
+HTTP = urllib3.PoolManager(
+    num_pools=32, maxsize=32, retries=Retry(total=3, backoff_factor=0.5),
+    timeout=urllib3.Timeout(connect=10, read=60),
+    socket_options=HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_RECEIVE_BUFFER)
+    ]
+)
+
+
+def ranged_content_length(http, url):
+    """Returns the size of url if the server accepts byte-range requests, else None."""
+    response = http.request('HEAD', url, headers={'Accept-Encoding': 'identity'})
+    if response.status != 200 or response.headers.get('Accept-Ranges', '').lower() != 'bytes':
+        return None
+    return int(response.headers.get('Content-Length', 0)) or None
+
+
+def download_range(http, url, path, start, end, bar):
+    """Downloads bytes start..end (inclusive) of url into the same offsets of the preallocated file."""
+    response = http.request(
+        'GET', url, headers={'Accept-Encoding': 'identity', 'Range': f'bytes={start}-{end}'}, preload_content=False
+    )
+    try:
+        if response.status != 206:
+            raise Exception(f"HTTP {response.status} for bytes {start}-{end} of {url}")
+        fd = os.open(path, os.O_WRONLY)
+        try:
+            offset = start
+            while True:
+                chunk = response.read(DOWNLOAD_BUFFER_SIZE)
+                if not chunk:
+                    break
+                os.pwrite(fd, chunk, offset)
+                offset += len(chunk)
+                bar.update(len(chunk))
+        finally:
+            os.close(fd)
+    finally:
+        response.release_conn()
+    if offset != end + 1:
+        raise Exception(f"Incomplete range {start}-{end} of {url}")
+
+
+def ranged_download(http, url, local_path, size, connections=DOWNLOAD_CONNECTIONS):
+    """Downloads url as parallel byte ranges written straight into a preallocated sparse file.
+
+    The file is recreated on every attempt; a leftover one from an interrupted run is not resumed.
+    """
+    temp_path = Path(str(local_path) + RANGED_TEMP_SUFFIX)
+    with open(temp_path, 'wb') as f:
+        f.truncate(size)
+    part_size = -(-size // connections)
+    ranges = [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+    with tqdm(total=size, unit='B', unit_scale=True, desc=temp_path.name) as bar, ThreadPoolExecutor(
+        max_workers=connections
+    ) as executor:
+        futures = [executor.submit(download_range, http, url, temp_path, start, end, bar) for start, end in ranges]
+        for future in futures:
+            future.result()
+    shutil.move(temp_path, local_path)
+    logger.info("Download completed and saved to %s", local_path)
+
+
+def robust_download(url, local_path, retries=3, http=HTTP):
+    """Downloads url to local_path through the pool manager, resuming a partial .part file when possible.
+
+    Large files from servers that accept byte ranges are fetched over several connections at once;
+    if that fails, the download restarts as a single resumable stream.
+    """
+    temp_path = Path(str(local_path) + ".part")
+    if hasattr(os, 'pwrite') and not temp_path.exists():
+        try:
+            size = ranged_content_length(http, url)
+            if size and size >= MIN_RANGED_DOWNLOAD_SIZE:
+                ranged_download(http, url, local_path, size)
+                return
+        except Exception as e:
+            logger.warning("Parallel download failed, falling back to a single stream: %s", e)
+        finally:
+            Path(str(local_path) + RANGED_TEMP_SUFFIX).unlink(missing_ok=True)
+    for attempt in range(retries):
+        try:
+            headers = {'Accept-Encoding': 'identity'}
+            resume_byte_pos = temp_path.stat().st_size if temp_path.exists() else 0
+
+            if resume_byte_pos:
+                headers['Range'] = f'bytes={resume_byte_pos}-'
+                logger.info("Resuming download from byte position %s", resume_byte_pos)
+
+            response = http.request('GET', url, headers=headers, preload_content=False)
+            try:
+                if response.status not in (200, 206):
+                    raise Exception(f"HTTP {response.status} for {url}")
+                if response.status == 200 and resume_byte_pos:
+                    logger.info("Server ignored the Range request, restarting download")
+                    resume_byte_pos = 0
+                mode = 'ab' if resume_byte_pos else 'wb'
+
+                total_size = int(response.headers.get('Content-Length', 0)) + resume_byte_pos
+                with open(temp_path, mode) as f, tqdm.wrapattr(
+                    response, 'read', total=total_size, initial=resume_byte_pos, desc=temp_path.name
+                ) as wrapped:
+                    shutil.copyfileobj(wrapped, f, length=DOWNLOAD_BUFFER_SIZE)
+            finally:
+                response.release_conn()
+
+            shutil.move(temp_path, local_path)
+            logger.info("Download completed and saved to %s", local_path)
+            return
+        except Exception as e:
+            logger.warning("Attempt %d failed: %s", attempt + 1, e)
+            if attempt < retries - 1:
+                logger.info("Retrying...")
+    raise Exception("All download attempts failed.")
@@ -1,11 +1,20 @@
-import urllib.request
+import os
+import numpy as np
 import rasterio
-from rasterio.mask import mask
-import geopandas as gpd
+from rasterio.crs import CRS
+from rasterio.transform import Affine
+from rasterio.errors import WindowError
+from rasterio.features import geometry_mask
+import shapely
+from shapely.geometry import mapping
 from pathlib import Path
-from tqdm import tqdm
 import logging
-import shutil
+
+from popclip.data_clipper import (
+    RASTER_BLOCK_SIZE, bounds_window, gtiff_profile, read_boundary, repair_geometries, reproject,
+    simplify_for_raster
+)
+from popclip.download import robust_download
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,47 +26,82 @@ class PopulationRasterClipper:
         "2018": "https://data.worldpop.org/GIS/Population/Global_2000_2020/2018/0_Mosaicked/ppp_2018_1km_Aggregated.tif"
     }
 
-    def __init__(self, data_folder="data"):
+    # Output formats: one GeoTIFF per year, or every year as a slice of one Zarr store.
+    OUTPUT_FORMATS = ("geotiff", "zarr")
+    ZARR_STORE = "clipped_population.zarr"
+
+    def __init__(self, data_folder="data", output_format="geotiff"):
+        if output_format not in self.OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
         self.data_folder = Path(data_folder)
         self.data_folder.mkdir(parents=True, exist_ok=True)
+        self.output_format = output_format
+        self._clip_shapes_by_crs = {}
 
     def robust_download(self, url, local_path, retries=3):
-        temp_path = Path(str(local_path) + ".part")
-        for attempt in range(retries):
-            try:
-                req = urllib.request.Request(url)
-                resume_byte_pos = temp_path.stat().st_size if temp_path.exists() else 0
-
-                if resume_byte_pos:
-                    req.add_header('Range', f'bytes={resume_byte_pos}-')
-                    mode = 'ab'
-                    logger.info("Resuming download from byte position %s", resume_byte_pos)
-                else:
-                    mode = 'wb'
-
-                with urllib.request.urlopen(req) as response:
-                    total_size = int(response.getheader('Content-Length', 0)) + resume_byte_pos
-                    with open(temp_path, mode) as f, tqdm(
-                        total=total_size, initial=resume_byte_pos,
-                        unit='B', unit_scale=True, desc=temp_path.name
-                    ) as bar:
-                        while True:
-                            chunk = response.read(8192)
-                            if not chunk:
-                                break
-                            f.write(chunk)
-                            bar.update(len(chunk))
-
-                shutil.move(temp_path, local_path)
-                logger.info("Download completed and saved to %s", local_path)
-                return
-            except Exception as e:
-                logger.warning("Attempt %d failed: %s", attempt + 1, e)
-                if attempt < retries - 1:
-                    logger.info("Retrying...")
-        raise Exception("All download attempts failed.")
-
-    def clip_raster(self, year, geojson_path, output_folder):
+        robust_download(url, local_path, retries)
+
+    def _clip_shapes_for(self, geojson_path, geojson, src):
+        """Returns the boundary's bounds and GeoJSON-like mappings in src's CRS, built once per boundary file,
+        CRS and resolution with the same reproject and simplify_for_raster steps DataClipper uses."""
+        key = (str(geojson_path), os.path.getmtime(geojson_path), src.crs, src.res)
+        if key not in self._clip_shapes_by_crs:
+            geoms = np.array(geojson.geometry.values)
+            if geojson.crs != src.crs:
+                logger.info("Reprojecting GeoJSON to raster CRS.")
+                geoms = reproject(geoms, geojson.crs, src.crs)
+            geoms = simplify_for_raster(geoms, src.res)
+            self._clip_shapes_by_crs[key] = (shapely.total_bounds(geoms), [mapping(geom) for geom in geoms])
+        return self._clip_shapes_by_crs[key]
+
+    def _narrow_dtype(self, image, meta, target_dtype):
+        """Rounds image into integer target_dtype when every valid value fits, using the dtype's max as nodata."""
+        info = np.iinfo(target_dtype)
+        valid = np.isfinite(image)
+        if meta["nodata"] is not None:
+            valid &= image != meta["nodata"]
+        values = np.rint(image[valid])
+        if values.size and (values.min() < info.min or values.max() >= info.max):
+            logger.warning("Clipped values do not fit %s, keeping %s.", target_dtype, meta["dtype"])
+            return image, meta
+
+        narrowed = np.full(image.shape, info.max, dtype=target_dtype)
+        narrowed[valid] = values
+        meta = dict(meta, dtype=np.dtype(target_dtype).name, nodata=info.max)
+        return narrowed, meta
+
+    def _write_zarr(self, year, image, meta, store_path):
+        """Writes the clipped first band as the year's slice of a (years, height, width) Zarr store.
+
+        The store is created on first use with one 512x512 chunk plane per year, so adding a year only
+        writes that year's chunks. Every year must be clipped to the same boundary and dtype.
+        """
+        import zarr
+        from numcodecs import Blosc
+
+        years = sorted(self.RASTER_URLS)
+        fill_value = meta["nodata"] if meta["nodata"] is not None else 0
+        store = zarr.open_array(
+            str(store_path), mode="a", shape=(len(years), meta["height"], meta["width"]),
+            chunks=(1, RASTER_BLOCK_SIZE, RASTER_BLOCK_SIZE), dtype=meta["dtype"], fill_value=fill_value,
+            compressor=Blosc(cname="zstd", clevel=3, shuffle=Blosc.BITSHUFFLE),
+        )
+        if store.shape[1:] != image.shape[1:] or store.dtype != image.dtype:
+            raise ValueError(
+                f"{store_path} holds {store.dtype} rasters of shape {store.shape[1:]}, "
+                f"cannot add a {image.dtype} raster of shape {image.shape[1:]}"
+            )
+        if "years" not in store.attrs:
+            store.attrs.update({
+                "years": years,
+                "crs": meta["crs"].to_wkt(),
+                "transform": list(meta["transform"])[:6],
+                "nodata": meta["nodata"],
+            })
+        store[years.index(str(year))] = image[0]
+        return store_path
+
+    def clip_raster(self, year, geojson_path, output_folder, target_dtype=None):
         raster_url = self.RASTER_URLS.get(str(year))
         if not raster_url:
             raise ValueError(f"No raster URL found for the year: {year}")
@@ -68,38 +112,50 @@ class PopulationRasterClipper:
         if not local_raster_path.exists():
             self.robust_download(raster_url, local_raster_path)
 
-        geojson = gpd.read_file(geojson_path)
+        geojson = read_boundary(geojson_path)
 
         if geojson.empty:
             raise ValueError("GeoJSON file provided is empty.")
 
-        geojson = geojson[geojson.is_valid]
-        if geojson.empty:
-            raise ValueError("No valid geometries in GeoJSON.")
+        geojson, repaired = repair_geometries(geojson)
+        if repaired:
+            logger.warning("Repaired %d invalid geometries in GeoJSON", repaired)
 
         with rasterio.open(local_raster_path) as src:
             if geojson.crs is None:
                 raise ValueError("GeoJSON file has no CRS defined. Please define a valid CRS.")
 
-            if geojson.crs != src.crs:
-                logger.info("Reprojecting GeoJSON to raster CRS.")
-                geojson = geojson.to_crs(src.crs)
-
-            clipped_image, clipped_transform = mask(src, geojson.geometry, crop=True)
-
-            if clipped_image.size == 0:
+            clip_bounds, clip_shapes = self._clip_shapes_for(geojson_path, geojson, src)
+            try:
+                window = bounds_window(src, clip_bounds)
+            except WindowError:  # the boundary misses the raster
+                window = None
+            if window is None or window.width == 0 or window.height == 0:
                 raise ValueError("Clipping resulted in an empty raster.")
 
+            # What mask(crop=True) does, minus its per-call geometry conversion and extra array copy.
+            clipped_image = src.read(window=window)
+            clipped_transform = src.window_transform(window)
+            outside = geometry_mask(clip_shapes, out_shape=clipped_image.shape[1:], transform=clipped_transform)
+            clipped_image[:, outside] = src.nodata if src.nodata is not None else 0
+
             clipped_meta = src.meta.copy()
             clipped_meta.update({
-                "driver": "GTiff",
                 "height": clipped_image.shape[1],
                 "width": clipped_image.shape[2],
                 "transform": clipped_transform
             })
+            if target_dtype is not None:
+                clipped_image, clipped_meta = self._narrow_dtype(clipped_image, clipped_meta, target_dtype)
+            clipped_meta.update(gtiff_profile(clipped_meta["dtype"], clipped_meta["width"], clipped_meta["height"]))
 
         output_path = Path(output_folder)
         output_path.mkdir(parents=True, exist_ok=True)
+        if self.output_format == "zarr":
+            store_path = self._write_zarr(year, clipped_image, clipped_meta, output_path / self.ZARR_STORE)
+            logger.info("Clipped raster for %s saved in %s", year, store_path)
+            return store_path
+
         clipped_raster_path = output_path / f"clipped_population_{year}.tif"
 
         with rasterio.open(clipped_raster_path, "w", **clipped_meta) as dst:
@@ -109,16 +165,49 @@ class PopulationRasterClipper:
         return clipped_raster_path
 
 
-if __name__ == "__main__":
+def zarr_to_geotiff(store_path, year, output_path):
+    """Writes one year of a clipped population Zarr store back out as a GeoTIFF."""
+    import zarr
+
+    store = zarr.open_array(str(store_path), mode="r")
+    years = store.attrs["years"]
+    if str(year) not in years:
+        raise ValueError(f"No year {year} in {store_path}, available: {', '.join(years)}")
+
+    _, height, width = store.shape
+    meta = {
+        "count": 1,
+        "dtype": store.dtype.name,
+        "height": height,
+        "width": width,
+        "crs": CRS.from_wkt(store.attrs["crs"]),
+        "transform": Affine(*store.attrs["transform"]),
+        "nodata": store.attrs["nodata"],
+    }
+    meta.update(gtiff_profile(meta["dtype"], width, height))
+    with rasterio.open(output_path, "w", **meta) as dst:
+        dst.write(store[years.index(str(year))], 1)
+    return Path(output_path)
+
+
+def main():
     import argparse
 
     parser = argparse.ArgumentParser(description="Download and clip population raster data.")
     parser.add_argument("year", choices=["2018", "2019", "2020"], help="Year of raster data")
     parser.add_argument("geojson", help="Path to GeoJSON file")
     parser.add_argument("output_folder", help="Output directory for clipped raster")
+    parser.add_argument("--format", choices=PopulationRasterClipper.OUTPUT_FORMATS, default="geotiff",
+                        help="Write a GeoTIFF per year, or add the year to a Zarr store in output_folder")
+    parser.add_argument("--dtype", choices=["uint16", "int16", "uint32", "int32"],
+                        help="Round population counts into this integer type when they fit")
 
     args = parser.parse_args()
 
-    clipper = PopulationRasterClipper()
-    raster_path = clipper.clip_raster(args.year, args.geojson, args.output_folder)
-    logger.info("Raster available at: %s", raster_path)
\ No newline at end of file
+    clipper = PopulationRasterClipper(output_format=args.format)
+    raster_path = clipper.clip_raster(args.year, args.geojson, args.output_folder, target_dtype=args.dtype)
+    logger.info("Raster available at: %s", raster_path)
+
+
+if __name__ == "__main__":
+    main()
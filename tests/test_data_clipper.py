@@ -0,0 +1,104 @@
+import numpy as np
+import geopandas as gpd
+import shapely
+
+from popclip.data_clipper import DataClipper, _init_worker, reproject
+
+
+def make_clipper(tmp_path, mask_geom, crs="EPSG:3857", input_path=None, output_folder=None, **options):
+    """Builds a DataClipper around an in-memory boundary, writing into tmp_path/output by default."""
+    mask = gpd.GeoDataFrame(geometry=[mask_geom], crs=crs)
+    return DataClipper(
+        str(input_path or tmp_path / "input.geojson"), str(tmp_path / "mask.geojson"),
+        str(output_folder or tmp_path / "output"), geojson=mask, **options
+    )
+
+
+def test_clip_to_mask_drops_features_that_only_touch_the_mask(tmp_path):
+    # 75 unit cells make up the L; the cells around it share only an edge or a corner with it.
+    l_shape = shapely.union(shapely.box(0, 0, 10, 5), shapely.box(0, 0, 5, 10))
+    clipper = make_clipper(tmp_path, l_shape)
+    cells = [shapely.box(x, y, x + 1, y + 1) for x in range(-1, 11) for y in range(-1, 11)]
+    grid = gpd.GeoDataFrame(geometry=cells, crs="EPSG:3857")
+
+    clipped = clipper.clip_to_mask(grid)
+
+    assert len(clipped) == 75
+    assert set(clipped.geom_type) == {"Polygon"}
+    assert clipped.area.sum() == l_shape.area
+
+
+def test_intersect_tile_keeps_a_lone_point(tmp_path):
+    clipper = make_clipper(tmp_path, shapely.Polygon([(0, 0), (10, 0), (0, 10)]))
+    tile = np.array([shapely.Point(1, 1)])
+
+    clipped = clipper.intersect_tile(tile.copy())
+
+    assert shapely.equals(clipped, tile).all()
+
+
+def test_reproject_keeps_z():
+    point = reproject(shapely.Point(5, 5, 100), "EPSG:4326", "EPSG:3857")
+
+    assert shapely.has_z(point)
+    assert shapely.get_coordinates(point, include_z=True)[0, 2] == 100
+
+
+def test_process_never_overwrites_a_vector_input(tmp_path):
+    roads = tmp_path / "roads.geojson"
+    gpd.GeoDataFrame(
+        {"id": [1, 2]}, geometry=[shapely.Point(5, 5), shapely.Point(50, 50)], crs="EPSG:3857"
+    ).to_file(roads, driver="GeoJSON")
+    clipper = make_clipper(
+        tmp_path, shapely.box(0, 0, 10, 10), input_path=roads, output_folder=tmp_path, output_format="geojson"
+    )
+
+    clipper.process()
+
+    assert len(gpd.read_file(roads)) == 2
+    assert list(gpd.read_file(tmp_path / "roads.geojson.geojson")["id"]) == [1]
+
+
+def test_clip_to_bbox_keeps_features_outside_the_polygon(tmp_path):
+    points = tmp_path / "points.geojson"
+    gpd.GeoDataFrame(
+        {"id": [1, 2, 3]}, geometry=[shapely.Point(1, 1), shapely.Point(8, 8), shapely.Point(9, 2)], crs="EPSG:3857"
+    ).to_file(points, driver="GeoJSON")
+    # Only id 1 lies inside the triangle, but all three lie inside its bounding box.
+    triangle = shapely.Polygon([(0, 0), (10, 0), (0, 10)])
+    clipper = make_clipper(tmp_path, triangle, input_path=points, output_format="geojson", clip_to_bbox=True)
+
+    clipper.process()
+
+    clipped = gpd.read_file(tmp_path / "output" / "points.geojson.geojson")
+    assert sorted(clipped["id"]) == [1, 2, 3]
+
+
+def test_outputs_are_redone_when_an_option_changes(tmp_path):
+    output = tmp_path / "clipped.tif"
+    output.touch()
+    input_path = str(tmp_path / "input.tif")
+    make_clipper(tmp_path, shapely.box(0, 0, 10, 10)).write_sidecar(input_path, str(output))
+
+    assert make_clipper(tmp_path, shapely.box(0, 0, 10, 10)).is_up_to_date(input_path, str(output))
+    assert not make_clipper(tmp_path, shapely.box(0, 0, 10, 10), warp_to_mask_crs=True).is_up_to_date(
+        input_path, str(output)
+    )
+
+
+def test_batch_workers_recognise_outputs_of_a_single_run(tmp_path):
+    import popclip.data_clipper as data_clipper
+
+    output = tmp_path / "clipped.tif"
+    output.touch()
+    input_path = str(tmp_path / "input.tif")
+    single = make_clipper(tmp_path, shapely.box(0, 0, 10, 10), crs="EPSG:4326")
+    single.write_sidecar(input_path, str(output))
+
+    # Rebuild the boundary the way process_datasets hands it to its worker processes.
+    _init_worker(shapely.to_wkb(single._mask_union), single.geojson.crs.to_wkt(), 1)
+    worker = DataClipper(
+        input_path, str(tmp_path / "mask.geojson"), str(tmp_path / "output"), geojson=data_clipper._MASK
+    )
+
+    assert worker.is_up_to_date(input_path, str(output))